@@ -3,9 +3,10 @@ import json
 import networkx as nx
 import utils
 import xml.etree.ElementTree as ET
+from collections import deque
 from pathlib import Path
 from scipy.sparse.coo import coo_matrix
-from typing import Dict, List, Set
+from typing import Deque, Dict, FrozenSet, List, Set, Tuple
 
 
 class BaseGraph(nx.DiGraph):
@@ -33,6 +34,10 @@ class BaseGraph(nx.DiGraph):
         # The ids of the nodes in which the final proposition is true
         self.goal_nodes: List[int] = []
 
+        # The adjacency matrices already computed, indexed by whether they are
+        # directed. The graph must not be modified once they are computed
+        self.adjacency_matrices: Dict[bool, coo_matrix] = {}
+
     def load_nodes_and_edges(self, graph: nx.DiGraph):
         self.add_nodes_from(graph.nodes(data=True))
         self.add_edges_from(graph.edges(data=True))
@@ -62,24 +67,28 @@ class BaseGraph(nx.DiGraph):
     def _load_xml(self, path: str = None, string: str = None):
         graph = self._create_mulval_graph(path, string)
 
-        # Fill the exploits dictionary by using BFS
-        visited_propositions = []
-        nodes_to_visit_next = []
+        # Fill the exploits dictionary by using BFS. The visited propositions
+        # are kept in a set as they are only used to check membership
+        visited_propositions: Set[int] = set()
+
+        # The nodes to visit are kept in a queue so that the first one is
+        # removed in place instead of copying the rest of the list
+        nodes_to_visit_next: Deque[int] = deque()
 
         # Add the root nodes to nodes_to_visit_next
         for node in graph.nodes():
-            predecessors = list(graph.predecessors(node))
-            if predecessors == []:
+            if graph.in_degree(node) == 0:
                 nodes_to_visit_next.append(node)
 
         # Apply BFS
-        while nodes_to_visit_next != []:
-            node = nodes_to_visit_next[0]
+        while len(nodes_to_visit_next) > 0:
+            # Remove the node from the list of nodes to visit
+            node = nodes_to_visit_next.popleft()
             data = graph.nodes[node]
 
             if data["type"] == "proposition":
                 # The node is a proposition
-                visited_propositions.append(node)
+                visited_propositions.add(node)
                 successors = list(graph.successors(node))
 
                 # If there is no successor to this proposition node, it means
@@ -90,9 +99,6 @@ class BaseGraph(nx.DiGraph):
                 for successor in successors:
                     if successor not in nodes_to_visit_next:
                         nodes_to_visit_next.append(successor)
-
-                # Remove the node to the list of nodes to visit
-                nodes_to_visit_next = nodes_to_visit_next[1:]
             elif data["type"] == "exploit":
                 # The node is an exploit
                 predecessors = list(graph.predecessors(node))
@@ -102,13 +108,9 @@ class BaseGraph(nx.DiGraph):
 
                 # Compute the required propositions
                 required_propositions = sorted(predecessors)
-                is_possible = [
-                    i for i in required_propositions
-                    if i not in visited_propositions
-                ] == []
+                is_possible = visited_propositions.issuperset(
+                    required_propositions)
 
-                # Remove the node from the list of nodes to visit
-                nodes_to_visit_next = nodes_to_visit_next[1:]
                 if is_possible:
                     # Add the exploit
                     exploit = dict(text=data["text"],
@@ -118,7 +120,7 @@ class BaseGraph(nx.DiGraph):
 
                     # Add the granted proposition at the beginning of the list
                     # of nodes to visit
-                    nodes_to_visit_next.insert(0, successors[0])
+                    nodes_to_visit_next.appendleft(successors[0])
                 else:
                     # Add the node at the end of the list of nodes to visit
                     nodes_to_visit_next.append(node)
@@ -206,13 +208,16 @@ class BaseGraph(nx.DiGraph):
         file = Path(path)
         utils.create_parent_folders(file)
 
-        data = self._write_data()
-
+        # The files are only meant to be loaded again so they are written
+        # without indentation, which makes them several times smaller and
+        # faster to write for large graphs
         with open(file, mode="w") as f:
-            json.dump(data, f, indent=2)
+            f.write(self.write())
 
     def write(self) -> str:
-        return json.dumps(self._write_data(), indent=2)
+        # The string is only meant to be parsed again so it isn't indented,
+        # which also lets json use its C encoder
+        return json.dumps(self._write_data())
 
     def _write_data(self) -> dict:
         data = nx.node_link_data(self)
@@ -226,55 +231,70 @@ class BaseGraph(nx.DiGraph):
         data["goal_nodes"] = self.goal_nodes
 
     def get_node_ordering(self) -> Dict[int, int]:
-        ids_nodes = list(self.nodes)
-        return dict([(id, i) for i, id in enumerate(ids_nodes)])
+        return dict(zip(self.nodes, range(self.number_of_nodes())))
 
     def compute_adjacency_matrix(self, directed: bool = True) -> coo_matrix:
-        if directed:
-            network = self
-        else:
-            network = self.to_undirected()
-        return nx.adjacency_matrix(network)
+        if directed not in self.adjacency_matrices:
+            if directed:
+                adjacency_matrix = nx.adjacency_matrix(self)
+            else:
+                # The edges aren't weighted so two nodes are adjacent in the
+                # undirected graph if there is an edge between them in either
+                # direction. This avoids copying the whole graph with its
+                # attributes
+                directed_adjacency_matrix = self.compute_adjacency_matrix(
+                    directed=True)
+                adjacency_matrix = directed_adjacency_matrix.maximum(
+                    directed_adjacency_matrix.T)
+            self.adjacency_matrices[directed] = adjacency_matrix
+        return self.adjacency_matrices[directed]
 
     def get_pruned_graph(self, ids_exploits: List[int]):
         return
 
     def copy(self):
-        return copy.deepcopy(self)
+        # The copy is usually modified so the adjacency matrices are not kept
+        new_graph = copy.deepcopy(self)
+        new_graph.adjacency_matrices = {}
+        return new_graph
 
 
 class DependencyAttackGraph(BaseGraph):
     def fill_graph(self):
-        i_node = 0
+        # The nodes and edges are gathered first and added to the graph at
+        # once. The node of each proposition is kept to link the exploits
+        propositions_nodes: Dict[int, int] = {}
+        nodes: List[Tuple[int, dict]] = []
+        edges: List[Tuple[int, int]] = []
 
         # Add the nodes that correspond to the propositions
         for id in self.propositions:
-            self.add_node(i_node, id_proposition=id)
+            i_node = len(nodes)
+            nodes.append((i_node, dict(id_proposition=id)))
+            propositions_nodes[id] = i_node
 
             # If the id corresponds to the goal proposition, this node is the
             # goal node, which is unique
             if id == self.goal_proposition:
                 self.goal_nodes.append(i_node)
 
-            i_node += 1
-
         # Add the nodes that correspond to the exploits and the edges that link
         # them to the propositions
         for id, data in self.exploits.items():
-            self.add_node(i_node, id_exploit=id)
+            i_node = len(nodes)
+            nodes.append((i_node, dict(id_exploit=id)))
 
             # Add the edge to the granted proposition
-            node_granted_proposition = self._get_node_with_id_proposition(
-                data["granted_proposition"])
-            self.add_edge(i_node, node_granted_proposition)
+            node_granted_proposition = propositions_nodes[
+                data["granted_proposition"]]
+            edges.append((i_node, node_granted_proposition))
 
             # Add the edges from the required propositions
             for id_proposition in data["required_propositions"]:
-                node_required_proposition = self._get_node_with_id_proposition(
-                    id_proposition)
-                self.add_edge(node_required_proposition, i_node)
+                edges.append((propositions_nodes[id_proposition], i_node))
 
-            i_node += 1
+        self.add_nodes_from(nodes)
+        self.add_edges_from(edges)
 
         # Remove the nodes from which one can not reach the goal node
         self._remove_useless_nodes()
@@ -304,46 +324,52 @@ class DependencyAttackGraph(BaseGraph):
         ][0]
 
     def _remove_useless_nodes(self):
+        # Removing a node can only make its neighbours useless, so they are
+        # the only nodes checked again instead of going over the whole graph
+        # until nothing is removed
         goal_node = self.goal_nodes[0]
-        has_removed_nodes = True
-        while has_removed_nodes:
-            nodes_to_remove = []
-            for node, data in self.nodes(data=True):
-                # Check whether the node is a proposition or an exploit
-                if "id_proposition" in data:
-                    proposition = self.propositions[data["id_proposition"]]
-
-                    # If the node has no successor and is not the goal node,
-                    # we remove it
-                    if node != goal_node and len(list(
-                            self.successors(node))) == 0:
-                        nodes_to_remove.append(node)
-
-                    # If the node has no predecessor and does not correspond to
-                    # a leaf proposition, we remove it
-                    elif not proposition["initial"] and len(
-                            list(self.predecessors(node))) == 0:
-                        nodes_to_remove.append(node)
-
-                        # If this node is the goal node, we remove it from the
-                        # list of goal nodes
-                        if node in self.goal_nodes:
-                            self.goal_nodes.remove(node)
-                else:
-                    exploit = self.exploits[data["id_exploit"]]
+        nodes_to_check = list(self.nodes)
+        while len(nodes_to_check) > 0:
+            node = nodes_to_check.pop()
+            if node in self and self._is_node_useless(node, goal_node):
+                nodes_to_check.extend(self.predecessors(node))
+                nodes_to_check.extend(self.successors(node))
+                self.remove_node(node)
+
+    def _is_node_useless(self, node: int, goal_node: int) -> bool:
+        data = self.nodes[node]
+
+        # Check whether the node is a proposition or an exploit
+        if "id_proposition" in data:
+            proposition = self.propositions[data["id_proposition"]]
+
+            # If the node has no successor and is not the goal node, it is
+            # useless
+            if node != goal_node and self.out_degree(node) == 0:
+                return True
+
+            # If the node has no predecessor and does not correspond to a leaf
+            # proposition, it is useless
+            if not proposition["initial"] and self.in_degree(node) == 0:
+                # If this node is the goal node, we remove it from the list of
+                # goal nodes
+                if node in self.goal_nodes:
+                    self.goal_nodes.remove(node)
+                return True
+        else:
+            exploit = self.exploits[data["id_exploit"]]
 
-                    # If the node has no successor, we remove it
-                    if len(list(self.successors(node))) == 0:
-                        nodes_to_remove.append(node)
+            # If the node has no successor, it is useless
+            if self.out_degree(node) == 0:
+                return True
 
-                    # If the number of predecessors does not correspond to the
-                    # number of required propositions, we remove it
-                    elif len(list(self.predecessors(node))) != len(
-                            exploit["required_propositions"]):
-                        nodes_to_remove.append(node)
+            # If the number of predecessors does not correspond to the number
+            # of required propositions, it is useless
+            n_required_propositions = len(exploit["required_propositions"])
+            if self.in_degree(node) != n_required_propositions:
+                return True
 
-            self.remove_nodes_from(nodes_to_remove)
-            has_removed_nodes = len(nodes_to_remove) > 0
+        return False
 
     def _write_other_elements_in_data(self, data: dict):
         super()._write_other_elements_in_data(data)
@@ -362,8 +388,7 @@ class DependencyAttackGraph(BaseGraph):
     def get_branch_nodes(self) -> List[int]:
         branch_nodes = []
         for node, id_proposition in self.nodes(data="id_proposition"):
-            if id_proposition is not None and len(list(
-                    self.successors(node))) > 1:
+            if id_proposition is not None and self.out_degree(node) > 1:
                 branch_nodes.append(node)
         return branch_nodes
 
@@ -383,8 +408,10 @@ class StateAttackGraph(BaseGraph):
         # Create and add the initial node
         self.add_node(0, ids_propositions=ids_propositions)
 
-        # Fill the rest of the graph recursively
-        self._fill_graph_recursively_from_node(0, useful_exploits)
+        # Fill the rest of the graph recursively. The node holding each set of
+        # propositions is indexed to find the existing nodes in constant time
+        nodes_index = {frozenset(ids_propositions): 0}
+        self._fill_graph_recursively_from_node(0, useful_exploits, nodes_index)
 
         # Sort the integer arrays in the graph
         for node, ids_propositions in self.nodes(data="ids_propositions"):
@@ -421,7 +448,8 @@ class StateAttackGraph(BaseGraph):
         return self._get_useful_exploits(new_useful_propositions)
 
     def _fill_graph_recursively_from_node(self, node: int,
-                                          useful_exploits: Set[int]):
+                                          useful_exploits: Set[int],
+                                          nodes_index: Dict[FrozenSet, int]):
         current_ids_propositions: Set[int] = set(
             self.nodes[node]["ids_propositions"])
 
@@ -454,15 +482,10 @@ class StateAttackGraph(BaseGraph):
             new_ids_propositions = current_ids_propositions.copy()
             new_ids_propositions.add(data["granted_proposition"])
 
-            # Find if there are already nodes with such propositions
-            similar_nodes = [
-                i
-                for i, ids_propositions in self.nodes(data="ids_propositions")
-                if set(ids_propositions) == new_ids_propositions
-            ]
-            if len(similar_nodes) > 0:
-                similar_node = similar_nodes[0]
-                if similar_node in self.successors(node):
+            # Find if there is already a node with such propositions
+            similar_node = nodes_index.get(frozenset(new_ids_propositions))
+            if similar_node is not None:
+                if self.has_edge(node, similar_node):
                     self.edges[node,
                                similar_node]["ids_exploits"] += [id_exploit]
                 else:
@@ -475,13 +498,15 @@ class StateAttackGraph(BaseGraph):
                 self.add_node(
                     new_node,
                     ids_propositions=[int(i) for i in new_ids_propositions])
+                nodes_index[frozenset(new_ids_propositions)] = new_node
 
                 # Add a new edge
                 self.add_edge(node, new_node, ids_exploits=[id_exploit])
 
                 # Call this function starting from the new node
                 self._fill_graph_recursively_from_node(new_node,
-                                                       useful_exploits)
+                                                       useful_exploits,
+                                                       nodes_index)
 
     def get_pruned_graph(self, ids_exploits_to_keep: List[int]):
         # Copy this attack graph
@@ -506,7 +531,7 @@ class StateAttackGraph(BaseGraph):
             for node in new_graph.nodes:
                 # The nodes that have no predecessors and aren't the initial
                 # node must be removed
-                if node != 0 and len(list(new_graph.predecessors(node))) == 0:
+                if node != 0 and new_graph.in_degree(node) == 0:
                     nodes_to_remove.append(node)
 
                     # If the node is a goal node, remove it from the list of
@@ -516,8 +541,8 @@ class StateAttackGraph(BaseGraph):
 
                 # The nodes that have no successors and aren't one of the goal
                 # nodes must be removed
-                if node not in new_graph.goal_nodes and len(
-                        list(new_graph.successors(node))) == 0:
+                if node not in new_graph.goal_nodes and new_graph.out_degree(
+                        node) == 0:
                     nodes_to_remove.append(node)
 
             new_graph.remove_nodes_from(nodes_to_remove)
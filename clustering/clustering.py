@@ -1,9 +1,7 @@
-import clustering.space_metrics as space_metrics
-import networkx as nx
 import numpy as np
 from attack_graph import BaseGraph
-from sklearn.cluster import KMeans
-from typing import Dict, List
+from scipy.sparse import coo_matrix, csr_matrix
+from typing import Dict, List, Tuple
 
 
 class ClusteringMethod:
@@ -16,120 +14,132 @@ class ClusteringMethod:
             self.node_assignment[node] = 0
         self.clusters: Dict[int, List[int]] = {"0": [list(self.graph.nodes)]}
 
+        # Cluster of each node, in the order of the nodes of the graph
+        self.labels = np.zeros(self.graph.number_of_nodes(), dtype=np.int32)
+        self.ids_clusters = np.unique(self.labels)
+
+        # Sums of the weights of the edges between each pair of clusters,
+        # computed when one of the metrics first needs it
+        self.cluster_adjacency_matrix: np.ndarray = None
+
     def cluster(self):
         pass
 
     def update_clusters(self, node_assignment: List[int]):
-        self.node_assignment = {}
-        self.clusters = {}
-        for i, node in enumerate(self.graph.nodes):
-            id_cluster = node_assignment[i]
-            self.node_assignment[node] = id_cluster
-            if id_cluster in self.clusters:
-                self.clusters[id_cluster].append(node)
-            else:
-                self.clusters[id_cluster] = [node]
+        self.labels = np.asarray(node_assignment, dtype=np.int32)
+        ids_nodes = np.array(self.graph.nodes)
+
+        self.node_assignment = dict(
+            zip(ids_nodes.tolist(), self.labels.tolist()))
+
+        # Group the nodes by cluster with a stable sort so that the nodes of a
+        # cluster keep the order of the graph
+        order = np.argsort(self.labels, kind="stable")
+        self.ids_clusters, starts = np.unique(self.labels[order],
+                                              return_index=True)
+        nodes_by_cluster = np.split(ids_nodes[order], starts[1:])
+        self.clusters = dict(
+            zip(self.ids_clusters.tolist(),
+                [nodes.tolist() for nodes in nodes_by_cluster]))
+
+        self.cluster_adjacency_matrix = None
 
     def get_ids_clusters(self) -> np.array:
-        node_assignment = list(self.node_assignment.values())
-        return np.unique(node_assignment)
+        return self.ids_clusters
+
+    def get_cluster_adjacency_matrix(self) -> np.ndarray:
+        if self.cluster_adjacency_matrix is None:
+            adjacency_matrix = self.graph.compute_adjacency_matrix(
+                directed=False)
+            S = ClusteringMethod.compute_cluster_adjacency_matrix(
+                adjacency_matrix, self.labels)
+            self.cluster_adjacency_matrix = S
+        return self.cluster_adjacency_matrix
 
     def evaluate_modularity(self) -> float:
-        node_assignment = list(self.node_assignment.values())
-        return ClusteringMethod.modularity(self.graph, node_assignment)
+        return ClusteringMethod.compute_modularity(
+            self.get_cluster_adjacency_matrix())
 
     def evaluate_mean_silhouette_index(self) -> float:
         n = self.graph.number_of_nodes()
-        node_ordering = self.graph.get_node_ordering()
         ids_clusters = self.get_ids_clusters()
 
-        distance_matrix = np.zeros((n, n))
+        distance_matrix = self.compute_distance_matrix()
 
-        # Fill distance_matrix
-        distances = nx.shortest_path_length(self.graph.to_undirected())
-        for result in distances:
-            src = result[0]
-            i = node_ordering[src]
-            for dst, distance in result[1].items():
-                j = node_ordering[dst]
-                distance_matrix[i][j] = distance
+        # Compute the mean distance between each node and each cluster with a
+        # single matrix product. The distances are small integers so the
+        # product is exact in single precision
+        positions = np.searchsorted(ids_clusters, self.labels)
+        one_hot = np.zeros((n, len(ids_clusters)), dtype=np.float32)
+        one_hot[np.arange(n), positions] = 1
+        cluster_sizes = np.bincount(positions, minlength=len(ids_clusters))
+        mean_cluster_distances = distance_matrix.dot(one_hot) / cluster_sizes
 
         # Compute silhouette index node by node
-        nodes_silhouette_index = np.zeros(n)
-        clusters_content = [[
-            node_ordering[node] for node in self.graph.nodes
-            if self.node_assignment[node] == cluster
-        ] for cluster in ids_clusters]
-        for node in self.graph.nodes:
-            i = node_ordering[node]
-            node_cluster = self.node_assignment[node]
-
-            mean_cluster_distances = [
-                distance_matrix[i][clusters_content[cluster]].mean()
-                for cluster in ids_clusters
-            ]
-
-            a = mean_cluster_distances[node_cluster]
-            b = min([
-                distance
-                for cluster, distance in enumerate(mean_cluster_distances)
-                if cluster != node_cluster
-            ])
-
-            nodes_silhouette_index[i] = (b - a) / max(a, b)
+        a = mean_cluster_distances[np.arange(n), positions]
+        mean_cluster_distances[np.arange(n), positions] = np.inf
+        b = mean_cluster_distances.min(axis=1)
+        nodes_silhouette_index = (b - a) / np.maximum(a, b)
 
         mean_silhouette_index = nodes_silhouette_index.mean()
 
         return mean_silhouette_index
 
+    def compute_distance_matrix(self) -> np.ndarray:
+        n = self.graph.number_of_nodes()
+        adjacency_matrix: csr_matrix = self.graph.compute_adjacency_matrix(
+            directed=False).tocsr()
+        indptr = adjacency_matrix.indptr
+        indices = adjacency_matrix.indices
+
+        distance_matrix = np.zeros((n, n), dtype=np.float32)
+
+        # Row i of frontier is a bitset of the nodes at the current distance
+        # of node i and row i of reached is a bitset of the nodes at a lower or
+        # equal distance. The graph is undirected so the nodes at distance
+        # h + 1 of i are the union of the nodes at distance h of its
+        # neighbours, minus the nodes that have already been reached
+        reached = np.packbits(np.eye(n, dtype=bool), axis=1)
+        frontier = reached.copy()
+        has_neighbours = np.diff(indptr) > 0
+
+        distance = 0
+        while frontier.any():
+            distance += 1
+
+            new_frontier = np.zeros_like(frontier)
+            if has_neighbours.any():
+                new_frontier[has_neighbours] = np.bitwise_or.reduceat(
+                    frontier[indices], indptr[:-1][has_neighbours], axis=0)
+            new_frontier &= ~reached
+            reached |= new_frontier
+            frontier = new_frontier
+
+            # Unreachable couples of nodes keep a distance of 0
+            mask = np.unpackbits(frontier, axis=1, count=n).astype(bool)
+            distance_matrix[mask] = distance
+
+        return distance_matrix
+
     def evaluate_mean_conductance(self) -> float:
-        adjacency_matrix = self.graph.compute_adjacency_matrix(directed=False)
-        ids_clusters = self.get_ids_clusters()
-        node_ordering = self.graph.get_node_ordering()
-
-        # Compute the conductance for each cluster
-        cluster_conductances = np.zeros(len(ids_clusters))
-        for cluster in ids_clusters:
-            nodes = [
-                node for node in self.graph.nodes
-                if self.node_assignment[node] == cluster
-            ]
-            cluster_node_positions = [node_ordering[node] for node in nodes]
-            complement_node_positions = [
-                node_ordering[node] for node in self.graph.nodes
-                if node not in nodes
-            ]
-            numerator = adjacency_matrix[
-                cluster_node_positions][:, complement_node_positions].sum()
-
-            a_cluster = adjacency_matrix[cluster_node_positions].sum()
-            a_complement = adjacency_matrix[complement_node_positions].sum()
-            denominator = min(a_cluster, a_complement)
-
-            cluster_conductances[cluster] = numerator / denominator
+        S = self.get_cluster_adjacency_matrix()
+
+        # The cut of a cluster is the weight of the edges leaving it and its
+        # volume is the weight of the edges starting from it
+        volumes = S.sum(axis=1)
+        cuts = volumes - np.diag(S)
+        complement_volumes = S.sum() - volumes
+
+        cluster_conductances = cuts / np.minimum(volumes, complement_volumes)
 
         mean_cluster_conductance = cluster_conductances.mean()
 
         return mean_cluster_conductance
 
     def evaluate_mean_coverage(self) -> float:
-        adjacency_matrix = self.graph.compute_adjacency_matrix(directed=False)
-        ids_clusters = self.get_ids_clusters()
-        node_ordering = self.graph.get_node_ordering()
-
-        # Compute the coverage for each cluster
-        cluster_coverages = np.zeros(len(ids_clusters))
-        for cluster in ids_clusters:
-            nodes = [
-                node for node in self.graph.nodes
-                if self.node_assignment[node] == cluster
-            ]
-            cluster_node_positions = [node_ordering[node] for node in nodes]
-            numerator = adjacency_matrix[
-                cluster_node_positions][:, cluster_node_positions].sum()
-            denominator = adjacency_matrix.sum()
-
-            cluster_coverages[cluster] = numerator / denominator
+        S = self.get_cluster_adjacency_matrix()
+
+        cluster_coverages = np.diag(S) / S.sum()
 
         mean_cluster_coverage = cluster_coverages.mean()
 
@@ -137,53 +147,70 @@ class ClusteringMethod:
 
     @staticmethod
     def modularity(graph: BaseGraph, node_assignment: List[int]) -> float:
-        modularity = 0
+        adjacency_matrix: coo_matrix = graph.compute_adjacency_matrix(
+            directed=False).tocoo()
+        sum_within_clusters, sum_rows = ClusteringMethod.compute_cluster_sums(
+            adjacency_matrix, node_assignment)
 
-        adjacency_matrix = graph.compute_adjacency_matrix(directed=False)
-        ids_clusters = np.unique(node_assignment)
+        return ClusteringMethod.compute_modularity_from_sums(
+            sum_within_clusters, sum_rows, adjacency_matrix.data.sum())
 
-        sum_all_weights = adjacency_matrix.sum()
+    @staticmethod
+    def compute_cluster_sums(
+            adjacency_matrix: coo_matrix,
+            node_assignment: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        # Compute the diagonal and the row sums of the cluster adjacency
+        # matrix directly from the edges. The clusters are sorted by id
+        _, positions = np.unique(node_assignment, return_inverse=True)
+        positions = positions.ravel()
+        k = positions.max() + 1
+        clusters_src = positions[adjacency_matrix.row]
+        clusters_dst = positions[adjacency_matrix.col]
+        is_within = clusters_src == clusters_dst
+
+        sum_within_clusters = np.bincount(
+            clusters_src[is_within],
+            weights=adjacency_matrix.data[is_within],
+            minlength=k)
+        sum_rows = np.bincount(clusters_src,
+                               weights=adjacency_matrix.data,
+                               minlength=k)
+
+        return sum_within_clusters, sum_rows
 
-        for cluster in ids_clusters:
-            adj_matrix_cluster = adjacency_matrix[
-                node_assignment == cluster][:, node_assignment == cluster]
-            adj_matrix_out_cluster = adjacency_matrix[
-                node_assignment != cluster][:, node_assignment != cluster]
-            sum_within_cluster = adj_matrix_cluster.sum()
-            sum_all_cluster = sum_all_weights - adj_matrix_out_cluster.sum()
+    @staticmethod
+    def compute_modularity(S: np.ndarray) -> float:
+        # The weights within a cluster lie on the diagonal of S
+        return ClusteringMethod.compute_modularity_from_sums(
+            np.diag(S), S.sum(axis=1), S.sum())
+
+    @staticmethod
+    def compute_modularity_from_sums(sum_within_clusters: np.ndarray,
+                                     sum_rows: np.ndarray,
+                                     sum_all_weights: float) -> float:
+        # The weights of the edges that touch a cluster are the ones of its
+        # row and column in the cluster adjacency matrix
+        sum_all_clusters = 2 * sum_rows - sum_within_clusters
 
-            modularity += sum_within_cluster / sum_all_weights
-            modularity -= (sum_all_cluster / sum_all_weights)**2
+        modularity = np.sum(sum_within_clusters / sum_all_weights -
+                            (sum_all_clusters / sum_all_weights)**2)
 
         return modularity
 
     @staticmethod
-    def evaluate_space_clustering(X: np.array,
-                                  k_min: int,
-                                  k_max: int,
-                                  metric: str = "silhouette") -> List[int]:
-        best_score = -np.inf
-        best_node_assignment = None
-
-        for k in range(k_min, k_max + 1):
-            # Apply k-means with k clusters
-            node_assignment = KMeans(n_clusters=k).fit_predict(X)
-
-            # Compute the score
-            if metric == "silhouette":
-                score = space_metrics.score_with_silhouette(X, node_assignment)
-            elif metric == "ch":
-                score = space_metrics.score_with_calinski_harabasz(
-                    X, node_assignment)
-            elif metric == "db":
-                score = space_metrics.score_with_davies_bouldin(
-                    X, node_assignment)
-            else:
-                raise Exception(
-                    "The metric {} has not been implemented".format(metric))
-
-            if score > best_score:
-                best_score = score
-                best_node_assignment = node_assignment
-
-        return best_node_assignment
+    def compute_cluster_adjacency_matrix(
+            adjacency_matrix: csr_matrix,
+            node_assignment: List[int]) -> np.ndarray:
+        # Entry (a, b) of the result is the sum of the weights of the edges
+        # going from cluster a to cluster b. The clusters are sorted by id
+        _, positions = np.unique(node_assignment, return_inverse=True)
+        positions = positions.ravel()
+        n = positions.shape[0]
+        k = positions.max() + 1
+
+        # Build the one-hot encoding of the node assignment as a sparse matrix
+        # with one non-zero entry per row
+        data = np.ones(n, dtype=adjacency_matrix.dtype)
+        one_hot = csr_matrix((data, positions, np.arange(n + 1)), shape=(n, k))
+
+        return (one_hot.T @ adjacency_matrix @ one_hot).toarray()
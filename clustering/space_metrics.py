@@ -1,9 +1,71 @@
 import numpy as np
 import sklearn.metrics as metrics
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from typing import List
+
+# Above this number of samples, the silhouette score is computed on a random
+# subset of the samples
+SILHOUETTE_SAMPLE_SIZE = 5000
+
+# Below this number of samples, the full k-means is fast enough and is used
+# even when the mini-batch version is requested
+MINI_BATCH_MIN_SIZE = 500
+
+
+def evaluate_space_clustering(X: np.array,
+                              k_min: int,
+                              k_max: int,
+                              metric: str = "silhouette",
+                              mini_batch: bool = True) -> List[int]:
+    # Convert X once so that k-means and the scores work on contiguous
+    # float32 data
+    X = np.ascontiguousarray(X, dtype=np.float32)
+
+    best_score = -np.inf
+    best_node_assignment = None
+
+    mini_batch = mini_batch and X.shape[0] >= MINI_BATCH_MIN_SIZE
+
+    for k in range(k_min, k_max + 1):
+        # Apply k-means with k clusters. The mini-batch version converges much
+        # faster on large embeddings
+        if mini_batch:
+            k_means = MiniBatchKMeans(n_clusters=k,
+                                      batch_size=min(1024, X.shape[0]),
+                                      n_init=3,
+                                      random_state=0)
+        else:
+            k_means = KMeans(n_clusters=k)
+        node_assignment = k_means.fit_predict(X)
+
+        # Compute the score
+        if metric == "silhouette":
+            score = score_with_silhouette(X, node_assignment)
+        elif metric == "ch":
+            score = score_with_calinski_harabasz(X, node_assignment)
+        elif metric == "db":
+            score = score_with_davies_bouldin(X, node_assignment)
+        else:
+            raise Exception(
+                "The metric {} has not been implemented".format(metric))
+
+        if score > best_score:
+            best_score = score
+            best_node_assignment = node_assignment
+
+    return best_node_assignment
 
 
 def score_with_silhouette(X: np.array, labels: list):
-    return metrics.silhouette_score(X, labels)
+    # The silhouette score is quadratic in the number of samples so it is
+    # estimated on a subset of them for large inputs
+    sample_size = None
+    if X.shape[0] > SILHOUETTE_SAMPLE_SIZE:
+        sample_size = SILHOUETTE_SAMPLE_SIZE
+    return metrics.silhouette_score(X,
+                                    labels,
+                                    sample_size=sample_size,
+                                    random_state=0)
 
 
 def score_with_calinski_harabasz(X: np.array, labels: list):
@@ -1,9 +1,16 @@
 import numpy as np
 from attack_graph import BaseGraph
 from clustering.clustering import ClusteringMethod
-from scipy.sparse import csr_matrix
-from scipy.sparse.linalg import eigs
-from sklearn.cluster import KMeans
+from joblib import Parallel, delayed
+from scipy.sparse import csr_matrix, diags
+from scipy.sparse.linalg import LinearOperator, eigsh
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import pairwise_distances_argmin_min
+from typing import Dict, List, Tuple
+
+# Number of successive values of k evaluated in each run of Spectral1. It
+# doesn't depend on the number of cores so that the clusters don't either
+K_RUN_SIZE = 4
 
 
 class SpectralMethod(ClusteringMethod):
@@ -12,6 +19,9 @@ class SpectralMethod(ClusteringMethod):
 
         self.K = min(K, self.graph.number_of_nodes() - 2)
 
+        # Row-normalized first eigenvectors, indexed by their number
+        self.normalized_eigenvectors: Dict[int, np.ndarray] = {}
+
     def cluster(self):
         self.create_W()
         self.create_D()
@@ -23,48 +33,123 @@ class SpectralMethod(ClusteringMethod):
 
     def create_D(self):
         d = self.W.sum(axis=0).A1
-        self.D: np.ndarray = np.diag(d)
-        self.inverse_D: np.ndarray = np.diag(1 / d)
+        self.D: csr_matrix = diags(d, format="csr")
+        self.inverse_D: csr_matrix = diags(1 / d, format="csr")
 
     def create_M(self):
-        self.M: csr_matrix = csr_matrix(self.inverse_D).dot(self.W)
+        # M is the symmetric matrix D^-1/2 W D^-1/2. It has the same
+        # eigenvalues as the random walk matrix D^-1 W and its eigenvectors u
+        # give the ones of D^-1 W with D^-1/2 u. The eigen solver only needs
+        # products with M so it is never built explicitly
+        self.inverse_sqrt_d = np.sqrt(self.inverse_D.diagonal())
+        self.M = LinearOperator(self.W.shape,
+                                matvec=self.multiply_by_M,
+                                dtype="float")
+
+    def multiply_by_M(self, x: np.ndarray) -> np.ndarray:
+        x = x.ravel()
+        return self.inverse_sqrt_d * self.W.dot(self.inverse_sqrt_d * x)
 
     def compute_top_eigenvectors(self):
-        _, eigenvectors = eigs(self.M, k=self.K, which="LR")
-        eigenvectors: np.ndarray = eigenvectors.astype("float")
-
-        # Remove the all-ones eigenvector
-        eigenvectors = eigenvectors[:, 1:]
+        # M is symmetric so the faster and more robust Lanczos solver can be
+        # used. The clustering only needs moderately accurate eigenvectors and
+        # a larger Krylov subspace reduces the number of restarts
+        ncv = min(self.graph.number_of_nodes() - 1, max(20, 3 * self.K))
+
+        # ARPACK draws its starting vector from a generator whose state
+        # carries over between calls, which makes the eigenvectors depend on
+        # the previous clusterings. A seeded starting vector is given instead
+        v0 = np.random.RandomState(0).uniform(-1, 1, self.M.shape[0])
+        eigenvalues, eigenvectors = eigsh(self.M,
+                                          k=self.K,
+                                          which="LA",
+                                          ncv=ncv,
+                                          tol=1e-6,
+                                          v0=v0)
+
+        # Sort the eigenvectors by decreasing eigenvalue and get the ones of
+        # the random walk matrix. The leading eigenvalue is 1 and its
+        # eigenvector is the all-ones one, which is removed
+        order = np.flip(np.argsort(eigenvalues))[1:]
+        eigenvectors = self.inverse_sqrt_d[:, None] * eigenvectors[:, order]
 
         self.eigenvectors = eigenvectors
+        self.normalized_eigenvectors = {}
 
     def get_first_eigenvectors(self, k: int) -> np.ndarray:
-        eigenvectors = self.eigenvectors[:, :k]
-        norm = np.linalg.norm(eigenvectors, axis=1, ord=2)
-        eigenvectors = (eigenvectors.T / norm).T
-        return eigenvectors
+        if k not in self.normalized_eigenvectors:
+            eigenvectors = self.eigenvectors[:, :k]
+            norm = np.linalg.norm(eigenvectors, axis=1, ord=2, keepdims=True)
+            self.normalized_eigenvectors[k] = eigenvectors / norm
+        return self.normalized_eigenvectors[k]
 
 
 class Spectral1(SpectralMethod):
     def cluster(self):
         super().cluster()
 
-        best_node_assignment = None
-        best_modularity = -np.inf
-
-        for k in range(2, self.K + 1):
-            eigenvectors = self.get_first_eigenvectors(k - 1)
-
-            node_assignment = KMeans(n_clusters=k).fit_predict(eigenvectors)
-            modularity = ClusteringMethod.modularity(self.graph,
-                                                     node_assignment)
-
-            if modularity > best_modularity:
-                best_node_assignment = node_assignment
-                best_modularity = modularity
+        # The values of k are split into runs of successive values. The runs
+        # are evaluated in parallel
+        ks = list(range(2, self.K + 1))
+        evaluate = delayed(Spectral1.evaluate_successive_k)
+        tasks = []
+        for i_run in range(0, len(ks), K_RUN_SIZE):
+            run = ks[i_run:i_run + K_RUN_SIZE]
+            list_eigenvectors = [
+                self.get_first_eigenvectors(k - 1) for k in run
+            ]
+            tasks.append(evaluate(self.graph, list_eigenvectors, run))
+        runs_results = Parallel(n_jobs=-1)(tasks)
+
+        # Keep the first node assignment with the best modularity
+        results = sum(runs_results, [])
+        _, best_node_assignment = max(results, key=lambda result: result[0])
 
         self.update_clusters(best_node_assignment)
 
+    @staticmethod
+    def evaluate_successive_k(graph: BaseGraph,
+                              list_eigenvectors: List[np.ndarray],
+                              ks: List[int]) -> List[Tuple[float, np.ndarray]]:
+        results = []
+        node_assignment = None
+        for eigenvectors, k in zip(list_eigenvectors, ks):
+            k_means = None
+
+            # k-means can leave a cluster empty, for instance when rows of the
+            # eigenvectors repeat. The center of such a cluster is undefined so
+            # the warm start is only used when all the clusters found for
+            # k - 1 have nodes
+            if node_assignment is not None:
+                cluster_sizes = np.bincount(node_assignment, minlength=k - 1)
+                if np.all(cluster_sizes > 0):
+                    # Start from the clusters found for k - 1, to which is
+                    # added the node that is the farthest from them
+                    centers = np.zeros((k - 1, eigenvectors.shape[1]))
+                    np.add.at(centers, node_assignment, eigenvectors)
+                    centers /= cluster_sizes[:, None]
+                    _, distances = pairwise_distances_argmin_min(
+                        eigenvectors, centers)
+                    farthest_node = eigenvectors[np.argmax(distances)]
+                    init = np.vstack([centers, farthest_node])
+
+                    k_means = KMeans(n_clusters=k,
+                                     init=init,
+                                     n_init=1,
+                                     algorithm="elkan")
+
+            if k_means is None:
+                k_means = KMeans(n_clusters=k,
+                                 n_init=1,
+                                 algorithm="elkan",
+                                 random_state=0)
+
+            node_assignment = k_means.fit_predict(eigenvectors)
+            modularity = ClusteringMethod.modularity(graph, node_assignment)
+            results.append((modularity, node_assignment))
+
+        return results
+
 
 class Spectral2(SpectralMethod):
     def __init__(self, graph: BaseGraph, k_min: int = 2, K: int = 15):
@@ -84,12 +169,23 @@ class Spectral2(SpectralMethod):
         else:
             eigenvectors = self.get_first_eigenvectors(k - 1)
             best_node_assignment = KMeans(
-                n_clusters=k).fit_predict(eigenvectors)
+                n_clusters=k, n_init=1, algorithm="elkan",
+                random_state=0).fit_predict(eigenvectors)
         k += 1
 
-        # Measure the current modularity
-        modularity = ClusteringMethod.modularity(self.graph,
-                                                 best_node_assignment)
+        # Count the clusters and compute the sums of the weights within them
+        # and of their degrees. They are then updated each time a cluster is
+        # split, so the change of modularity can be measured from the nodes of
+        # the split cluster only
+        n_clusters = len(np.unique(best_node_assignment))
+        W: csr_matrix = self.W.tocsr()
+        d = self.D.diagonal()
+        sum_all_weights = d.sum()
+        sum_within_clusters, sum_rows = ClusteringMethod.compute_cluster_sums(
+            W.tocoo(), best_node_assignment)
+
+        # Sub cluster of each node of the cluster being split, -1 elsewhere
+        sub_clusters = np.full(self.graph.number_of_nodes(), -1)
 
         # Main loop
         cant_improve = False
@@ -99,12 +195,11 @@ class Spectral2(SpectralMethod):
 
             # Try to split one of the clusters to improve the modularity
             has_improved = False
-            clusters = np.unique(best_node_assignment)
             i_cluster = 0
-            while i_cluster < len(clusters) and not has_improved:
+            while i_cluster < n_clusters and not has_improved:
                 # Get the nodes in the cluster
-                nodes_in_cluster = np.arange(self.graph.number_of_nodes())[
-                    best_node_assignment == i_cluster]
+                nodes_in_cluster = np.flatnonzero(
+                    best_node_assignment == i_cluster)
 
                 # If there is only one node in the cluster, we can't split it
                 if len(nodes_in_cluster) == 1:
@@ -114,22 +209,47 @@ class Spectral2(SpectralMethod):
                 # Perform K-means with 2 clusters on the involved rows of the
                 # eigenvectors matrix
                 cluster_eigenvectors = eigenvectors[nodes_in_cluster]
-                sub_assignment = KMeans(
-                    n_clusters=2).fit_predict(cluster_eigenvectors)
+                sub_assignment = MiniBatchKMeans(
+                    n_clusters=2, n_init=1, batch_size=256,
+                    random_state=0).fit_predict(cluster_eigenvectors)
 
-                # Assign a new cluster to the nodes of the first sub cluster
                 nodes_in_sub_cluster_0 = nodes_in_cluster[sub_assignment == 0]
-                new_node_assignment = np.copy(best_node_assignment)
-                new_node_assignment[nodes_in_sub_cluster_0] = len(clusters)
-
-                # Measure if there has been an improvement
-                new_modularity = ClusteringMethod.modularity(
-                    self.graph, new_node_assignment)
 
-                if new_modularity > modularity:
-                    # If there has been an improvement, we keep the changes
-                    best_node_assignment = new_node_assignment
-                    modularity = new_modularity
+                # Compute the sums of the two sub clusters in a single pass
+                # over the edges starting from the cluster
+                sub_clusters[nodes_in_cluster] = sub_assignment
+                cluster_W: csr_matrix = W[nodes_in_cluster]
+                sub_clusters_src = np.repeat(sub_assignment,
+                                             np.diff(cluster_W.indptr))
+                is_within = sub_clusters[cluster_W.indices] == sub_clusters_src
+                sub_clusters[nodes_in_cluster] = -1
+
+                new_sum_within_clusters = np.bincount(
+                    sub_clusters_src[is_within],
+                    weights=cluster_W.data[is_within],
+                    minlength=2)
+                new_sum_rows = np.bincount(sub_assignment,
+                                           weights=d[nodes_in_cluster],
+                                           minlength=2)
+
+                # Measure if splitting the cluster improves the modularity
+                old_part = ClusteringMethod.compute_modularity_from_sums(
+                    sum_within_clusters[[i_cluster]], sum_rows[[i_cluster]],
+                    sum_all_weights)
+                new_part = ClusteringMethod.compute_modularity_from_sums(
+                    new_sum_within_clusters, new_sum_rows, sum_all_weights)
+
+                if new_part > old_part:
+                    # If there has been an improvement, we keep the changes by
+                    # assigning a new cluster to the nodes of the first sub
+                    # cluster
+                    best_node_assignment[nodes_in_sub_cluster_0] = n_clusters
+                    sum_within_clusters[i_cluster] = new_sum_within_clusters[1]
+                    sum_rows[i_cluster] = new_sum_rows[1]
+                    sum_within_clusters = np.append(sum_within_clusters,
+                                                    new_sum_within_clusters[0])
+                    sum_rows = np.append(sum_rows, new_sum_rows[0])
+                    n_clusters += 1
                     has_improved = True
                     k += 1
                 else:
@@ -3,23 +3,46 @@ import numpy as np
 import random
 import requests
 import utils
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Set
 
 
 class ExploitFetcher:
+    n_workers = 16
+
+    # Content of the files of fake exploits that have already been loaded,
+    # indexed by path. It is shared by all the fetchers since each generator
+    # creates its own
+    loaded_exploits: Dict[str, List[dict]] = {}
+
     def __init__(self):
         self.fake_exploits_file = Path(
             "methods_input/exploits/fake_exploits.json")
 
+        # Reuse the connections to the CVE database across the requests
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=ExploitFetcher.n_workers,
+            pool_maxsize=ExploitFetcher.n_workers)
+        self.session.mount("http://", adapter)
+
     def get_fake_exploit_list(self,
                               n_exploits: int,
                               update_file: bool = False,
                               shuffle: bool = False) -> List[dict]:
-        if self.fake_exploits_file.exists() and not update_file:
-            # Load the existing file of fake exploits
-            with open(self.fake_exploits_file, "r") as f:
-                all_exploits = json.load(f)
+        path = str(self.fake_exploits_file)
+        is_loaded = path in ExploitFetcher.loaded_exploits
+
+        # Load the existing file of fake exploits if it hasn't been loaded yet
+        if not update_file and not is_loaded:
+            if self.fake_exploits_file.exists():
+                with open(self.fake_exploits_file, "r") as f:
+                    ExploitFetcher.loaded_exploits[path] = json.load(f)
+                is_loaded = True
+
+        if not update_file and is_loaded:
+            all_exploits = ExploitFetcher.loaded_exploits[path]
 
             # Sample n_exploits exploits from this list
             ids_exploits = np.random.choice(len(all_exploits), size=n_exploits)
@@ -32,28 +55,33 @@ class ExploitFetcher:
             utils.create_parent_folders(self.fake_exploits_file)
             with open(self.fake_exploits_file, "w") as f:
                 json.dump(exploits, f, indent=2)
+            ExploitFetcher.loaded_exploits[path] = list(exploits)
 
         random.shuffle(exploits)
         return exploits
 
     def _generate_exploit_list(self, n_exploits: int) -> List[dict]:
-        # Generate a fake list of CVE ids
-        cve_ids = [
-            "cve-2020-{:04.0f}".format(random.randint(1, 9999))
-            for _ in range(n_exploits)
-        ]
-
-        # Fetch each one of the fake exploits
         exploits = []
-        for cve_id in cve_ids:
-            exploit = self._get_exploit_from_cve_id(cve_id)
-            if exploit is not None:
-                exploits.append(exploit)
-
-        # Some of the exploits may not exist. Thus, we must fill the list of
-        # exploits with new exploits
-        while len(exploits) < n_exploits:
-            exploits += self._generate_exploit_list(n_exploits - len(exploits))
+        fetched_cve_ids: Set[str] = set()
+
+        # Fetch the fake exploits concurrently since each request mostly
+        # waits for the network
+        with ThreadPoolExecutor(
+                max_workers=ExploitFetcher.n_workers) as executor:
+            # Some of the exploits may not exist. Thus, we must fill the list
+            # of exploits with new exploits until it is complete
+            while len(exploits) < n_exploits:
+                # Generate a fake list of CVE ids that haven't been fetched yet
+                cve_ids = set([
+                    "cve-2020-{:04.0f}".format(random.randint(1, 9999))
+                    for _ in range(n_exploits - len(exploits))
+                ]) - fetched_cve_ids
+                fetched_cve_ids |= cve_ids
+
+                results = executor.map(self._get_exploit_from_cve_id, cve_ids)
+                exploits += [
+                    exploit for exploit in results if exploit is not None
+                ]
 
         return exploits
 
@@ -61,11 +89,9 @@ class ExploitFetcher:
         # Create the url to fetch
         url = "http://api.cvesearch.com/search?q={}".format(cve_id)
 
-        # Fetch the url
-        response = requests.request("GET", url)
-
-        # Parse it
-        json_object = json.loads(response.text)
+        # Fetch the url and parse the response
+        response = self.session.get(url)
+        json_object = response.json()
 
         # Get the description text
         text = json_object["response"][cve_id]["basic"]["description"]
@@ -1,4 +1,5 @@
 import numpy as np
+import os
 from attack_graph import BaseGraph
 from embedding.embedding import EmbeddingMethod
 from karateclub import DeepWalk as DW
@@ -17,9 +18,12 @@ class DeepWalk(EmbeddingMethod):
 
     def embed(self):
         seed = np.random.randint(1e6)
+
+        # Use all the cores to learn the embedding from the walks
         model = DW(dimensions=self.dim_embedding,
                    walk_length=self.walk_length,
                    window_size=self.window_size,
+                   workers=os.cpu_count(),
                    seed=seed)
-        model.fit(self.graph.to_undirected())
+        model.fit(self.get_undirected_graph())
         self.embedding = model.get_embedding()
@@ -1,3 +1,5 @@
+import clustering.space_metrics as space_metrics
+import networkx as nx
 import numpy as np
 import utils
 from attack_graph import BaseGraph
@@ -8,16 +10,29 @@ class EmbeddingMethod(ClusteringMethod):
     def __init__(self, graph: BaseGraph, dim_embedding: int = 16):
         super().__init__(graph)
 
-        self.graph = graph
         self.dim_embedding = dim_embedding
+        self.n_nodes = graph.number_of_nodes()
 
-        self.embedding = np.zeros((graph.number_of_nodes(), dim_embedding))
+        self.embedding = np.zeros((self.n_nodes, dim_embedding))
+
+        # Undirected version of the graph, built when a method first needs it
+        self.undirected_graph: nx.Graph = None
 
     def embed(self):
         pass
 
+    def get_undirected_graph(self) -> nx.Graph:
+        if self.undirected_graph is None:
+            # Only the structure of the graph is kept. The attributes of the
+            # nodes and edges aren't copied, and the two directions of an edge
+            # give a single edge
+            self.undirected_graph = nx.Graph()
+            self.undirected_graph.add_nodes_from(self.graph.nodes)
+            self.undirected_graph.add_edges_from(self.graph.edges)
+        return self.undirected_graph
+
     def cluster(self, k_min: int = 2, k_max: int = 15):
-        node_assignment = ClusteringMethod.evaluate_space_clustering(
+        node_assignment = space_metrics.evaluate_space_clustering(
             X=self.embedding, k_min=k_min, k_max=k_max)
 
         self.update_clusters(node_assignment)
@@ -6,6 +6,7 @@ from embedding.embedding import EmbeddingMethod
 from torch_cluster import random_walk
 from torch_geometric.nn import SAGEConv
 from torch_geometric.data import Data, NeighborSampler as RawNeighborSampler
+from torch_sparse import SparseTensor
 
 
 class GraphSage(EmbeddingMethod):
@@ -31,21 +32,23 @@ class GraphSage(EmbeddingMethod):
         # Train the model
         self.train()
 
-        # Move the edge_index to the device
-        edge_index = self.data.edge_index.to(self.device)
-
         # Apply the model
         self.model.eval()
         self.embedding = self.model.full_forward(
-            self.x, edge_index).cpu().detach().numpy()
+            self.ids_nodes, self.device_adj_t).cpu().detach().numpy()
 
     def train(self):
         self.create_model_and_optimizer()
         self.create_data()
         self.create_neighbor_sampler()
 
-        # Move the data to the device
-        self.x = self.data.x.to(self.device)
+        # The input features of the nodes are learned by the model, which
+        # only needs their ids
+        self.ids_nodes = torch.arange(self.n_nodes, device=self.device)
+
+        # The full adjacency is moved to the device once and reused when
+        # embedding the nodes
+        self.device_adj_t = self.adj_t.to(self.device)
 
         # Train the model
         self.model.train()
@@ -57,15 +60,24 @@ class GraphSage(EmbeddingMethod):
     def train_one_epoch(self) -> float:
         total_loss = 0
         for _, n_id, adjs in self.neighbor_sampler:
-            moved_adjs = [adj.to(self.device) for adj in adjs]
+            # The batches are in pinned memory when training on a GPU so they
+            # are copied asynchronously
+            n_id = n_id.to(self.device, non_blocking=True)
+            moved_adjs = [
+                adj.to(self.device, non_blocking=True) for adj in adjs
+            ]
             self.optimizer.zero_grad()
 
-            out: torch.Tensor = self.model(self.x[n_id], moved_adjs)
+            out: torch.Tensor = self.model(n_id, moved_adjs)
             out, pos_out, neg_out = out.split(out.size(0) // 3, dim=0)
 
-            pos_loss = F.logsigmoid((out * pos_out).sum(-1)).mean()
-            neg_loss = F.logsigmoid(-(out * neg_out).sum(-1)).mean()
-            loss = -pos_loss - neg_loss
+            # Score the positive and the negative samples at once. The loss is
+            # the sum of the mean losses of both kinds of samples
+            samples = torch.stack([pos_out, neg_out])
+            logits = (out.unsqueeze(0) * samples).sum(-1)
+            targets = torch.zeros_like(logits)
+            targets[0] = 1
+            loss = 2 * F.binary_cross_entropy_with_logits(logits, targets)
             loss.backward()
             self.optimizer.step()
 
@@ -74,24 +86,31 @@ class GraphSage(EmbeddingMethod):
         return total_loss / self.data.num_nodes
 
     def create_model_and_optimizer(self):
-        self.model = Sage(self.graph.number_of_nodes(), self.dim_hidden_layer,
+        self.model = Sage(self.n_nodes, self.dim_hidden_layer,
                           self.dim_embedding)
         self.model = self.model.to(self.device)
         self.optimizer = torch.optim.Adam(self.model.parameters(), lr=0.01)
 
     def create_data(self):
-        x = torch.eye(self.graph.number_of_nodes())
         edge_index = torch.tensor(list(self.graph.edges), dtype=torch.long)
         edge_index = edge_index.t().contiguous()
 
-        self.data = Data(x=x, edge_index=edge_index)
+        self.data = Data(edge_index=edge_index, num_nodes=self.n_nodes)
+
+        # The layers aggregate the neighbours with a sparse matrix product
+        # when they are given the transposed adjacency as a sparse tensor
+        self.adj_t = SparseTensor(row=edge_index[1],
+                                  col=edge_index[0],
+                                  sparse_sizes=(self.n_nodes, self.n_nodes))
 
     def create_neighbor_sampler(self):
-        self.neighbor_sampler = NeighborSampler(self.data.edge_index,
+        pin_memory = torch.device(self.device).type == "cuda"
+        self.neighbor_sampler = NeighborSampler(self.adj_t,
                                                 sizes=[10, 10],
                                                 batch_size=256,
                                                 shuffle=True,
-                                                num_nodes=self.data.num_nodes)
+                                                num_nodes=self.data.num_nodes,
+                                                pin_memory=pin_memory)
 
     def show_message(self, message: str):
         if self.verbose:
@@ -99,46 +118,59 @@ class GraphSage(EmbeddingMethod):
 
 
 class Sage(nn.Module):
-    def __init__(self, dim_input: int, dim_hidden_1, dim_output):
+    def __init__(self, n_nodes: int, dim_hidden_1, dim_output):
         super().__init__()
 
-        self.layer_1 = SAGEConv(dim_input, dim_hidden_1)
-        self.layer_2 = SAGEConv(dim_hidden_1, dim_output)
+        # Applying a layer to one-hot features of the nodes amounts to
+        # selecting one learned vector per node. They are stored in an
+        # embedding table instead of multiplying an N x N identity matrix
+        self.features = nn.Embedding(n_nodes, dim_hidden_1)
+        self.layer_1 = SAGEConv(dim_hidden_1, dim_hidden_1, aggr="mean")
+        self.layer_2 = SAGEConv(dim_hidden_1, dim_output, aggr="mean")
+
+    def forward(self, n_id, adjs):
+        x = self.features(n_id)
 
-    def forward(self, x, adjs):
         # First layer
-        edge_index, _, size = adjs[0]
+        adj_t, _, size = adjs[0]
         x_target = x[:size[1]]
-        out = self.layer_1((x, x_target), edge_index)
+        out = self.layer_1((x, x_target), adj_t)
         out = F.relu(out)
         out = F.dropout(out, p=0.5, training=self.training)
 
         # Second layer
-        edge_index, _, size = adjs[1]
+        adj_t, _, size = adjs[1]
         x_target = out[:size[1]]
-        out = self.layer_2((out, x_target), edge_index)
+        out = self.layer_2((out, x_target), adj_t)
 
         return out
 
-    def full_forward(self, x, edge_index):
-        out = self.layer_1(x, edge_index)
+    def full_forward(self, n_id, adj_t):
+        x = self.features(n_id)
+        out = self.layer_1(x, adj_t)
         out = F.relu(out)
         out = F.dropout(out, p=0.5, training=self.training)
-        out = self.layer_2(out, edge_index)
+        out = self.layer_2(out, adj_t)
 
         return out
 
 
 class NeighborSampler(RawNeighborSampler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # The graph doesn't change between the batches so its coordinates are
+        # only extracted once. They come sorted by row from the sparse tensor
+        self.row, self.col, _ = self.adj_t.coo()
+
     def sample(self, batch):
         new_batch = torch.tensor(batch)
-        row, col, _ = self.adj_t.coo()
 
-        pos_batch = random_walk(row,
-                                col,
+        pos_batch = random_walk(self.row,
+                                self.col,
                                 new_batch,
                                 walk_length=1,
-                                coalesced=False)[:, 1]
+                                coalesced=True)[:, 1]
 
         neg_batch = torch.randint(0,
                                   self.adj_t.size(1), (new_batch.numel(), ),
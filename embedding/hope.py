@@ -20,16 +20,16 @@ class Hope(EmbeddingMethod):
 
         U, sigmas, Vt = sps.linalg.svds(self.S, k=int(self.dim_embedding / 2))
 
-        # Organize the singular vectors and singular values in ascending order
-        order = np.flip(np.argsort(sigmas))
-        sigmas = sigmas[order]
-        U = U[:, order]
-        Vt = Vt[order]
+        # Organize the singular vectors and singular values in descending
+        # order. svds returns them in ascending order so they are reversed
+        sigmas = sigmas[::-1]
+        U = U[:, ::-1]
+        Vt = Vt[::-1]
 
-        # Compute the embeddings
-        sigmas = np.diagflat(np.sqrt(sigmas))
-        left_embedding = np.dot(U, sigmas)
-        right_embedding = np.dot(Vt.T, sigmas)
+        # Compute the embeddings by scaling each singular vector
+        sqrt_sigmas = np.sqrt(sigmas)
+        left_embedding = U * sqrt_sigmas
+        right_embedding = Vt.T * sqrt_sigmas
 
         self.embedding = np.concatenate([left_embedding, right_embedding],
                                         axis=1)
@@ -48,25 +48,41 @@ class Hope(EmbeddingMethod):
         self.S: sps.coo_matrix = self.A.dot(self.A)
 
     def createSWithKatz(self, beta: float = 0.1):
-        Mg = sps.identity(self.graph.number_of_nodes()) - beta * self.A
+        Mg = sps.identity(self.n_nodes) - beta * self.A
         Ml = beta * self.A
 
-        self.S: sps.coo_matrix = sps.linalg.inv(Mg).dot(Ml)
+        # S = Mg^-1 Ml is dense so it is only applied to vectors, with a
+        # single LU factorization of Mg
+        lu = sps.linalg.splu(Mg.tocsc())
+        self.S = sps.linalg.LinearOperator(
+            Mg.shape,
+            matvec=lambda x: lu.solve(Ml.dot(x)),
+            rmatvec=lambda x: Ml.T.dot(lu.solve(x, trans="T")),
+            dtype=Mg.dtype)
 
     def createSWithPagerank(self, alpha: float = 0.5):
         sum_ = self.A.sum(axis=0)
         sum_ = np.where(sum_ == 0, 1, sum_)
         P = sps.coo_matrix(self.A / sum_)
 
-        Mg = sps.identity(self.graph.number_of_nodes()) - alpha * P
+        Mg = sps.identity(self.n_nodes) - alpha * P
 
-        self.S: sps.coo_matrix = (1 - alpha) * sps.linalg.inv(Mg)
+        # S = (1 - alpha) Mg^-1 is dense so it is only applied to vectors,
+        # with a single LU factorization of Mg
+        lu = sps.linalg.splu(Mg.tocsc())
+        self.S = sps.linalg.LinearOperator(
+            Mg.shape,
+            matvec=lambda x: (1 - alpha) * lu.solve(x),
+            rmatvec=lambda x: (1 - alpha) * lu.solve(x, trans="T"),
+            dtype=Mg.dtype)
 
     def createSWithAdamicAdar(self):
-        D = np.zeros(
-            (self.graph.number_of_nodes(), self.graph.number_of_nodes()))
-        for i in range(self.graph.number_of_nodes()):
-            D[i, i] = 1 / (self.A[i].sum() + self.A[:, i].sum())
-        D = sps.coo_matrix(D)
-
-        self.S: sps.coo_matrix = self.A.dot(D).dot(self.A)
+        # The degree of a node is the sum of its row and of its column. The
+        # nodes without any edge are never used so their degree is set to 1
+        degrees = self.A.sum(axis=1).A1 + self.A.sum(axis=0).A1
+        degrees[degrees == 0] = 1
+        D = sps.diags(1 / degrees, format="csr")
+
+        # The products are kept sparse from end to end, in CSR format
+        A = self.A.tocsr()
+        self.S: sps.csr_matrix = A.dot(D).dot(A)
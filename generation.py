@@ -32,6 +32,23 @@ class Generator:
         self.graph = nx.DiGraph()
         self.goal_proposition = None
 
+        # The nodes and edges are gathered during the generation and added to
+        # the graph at once when it is finished. The node of each proposition
+        # and its current number of successors are tracked meanwhile in lists
+        # indexed by the id of the proposition
+        self.n_nodes = 0
+        self.nodes: List[Tuple[int, dict]] = []
+        self.edges: List[Tuple[int, int]] = []
+        self.propositions_nodes: List[int] = []
+        self.propositions_current_n_successors: List[int] = []
+
+        # Node and id of the propositions that can still get successors,
+        # indexed by the id and kept in the order of creation
+        self.available_propositions: Dict[int, Tuple[int, int]] = {}
+
+        # Number of successors sampled in advance for each new proposition
+        self.sampled_n_successors: np.ndarray = None
+
     def generate_both_graphs(
             self) -> Tuple[StateAttackGraph, DependencyAttackGraph]:
         self._generate_exploits()
@@ -73,99 +90,105 @@ class Generator:
         return dependency_graph
 
     def _generate_exploits(self):
-        # Stop the recursion when we have enough exploits and only one goal
-        # proposition
-        if len(self.exploits) == self.n_exploits:
-            self._finish_graph()
-            return
-
-        # Get the list of available propositions
-        available_propositions = self._get_available_propositions()
-
-        if len(available_propositions) >= self.n_exploits - len(self.exploits):
-            # Stop creating new proposition and finish the graph
-            self.probability_new_proposition = 0
-
-        # Sample the number of propositions that are required for this exploit
-        # to be performed
-        n_required_propositions: int = np.random.choice(
+        # Sample all the random numbers at once. Each exploit creates at most
+        # one proposition per required proposition and its granted
+        # proposition. Each required proposition needs one number to decide
+        # if it is new and another one to pick an available proposition
+        max_n_propositions = self.n_exploits * (
+            max(self.exploits_prob_n_predecessors) + 1)
+        all_n_required_propositions = np.random.choice(
             list(self.exploits_prob_n_predecessors),
+            size=self.n_exploits,
             p=list(self.exploits_prob_n_predecessors.values()))
-
-        # Add and/or link propositions to the exploit
-        predecessors = []
-        required_propositions = []
-        for _ in range(n_required_propositions):
-            new = np.random.rand() < self.probability_new_proposition
-            if new or len(available_propositions) == 0:
-                # Create a new proposition
-                node, id_proposition = self._add_new_proposition(initial=True)
-            else:
-                # Sample one proposition from the list of available
-                # propositions
-                position = np.random.choice(len(available_propositions))
-                node, id_proposition = available_propositions.pop(position)
-
-            predecessors.append(node)
-            required_propositions.append(id_proposition)
-
-        # Create a new proposition representing the granted proposition
-        successor, granted_proposition = self._add_new_proposition(
-            initial=False)
-
-        # Add the new exploit
-        self._add_new_exploit(required_propositions, granted_proposition,
-                              predecessors, successor)
-
-        # Call the function recursively
-        self._generate_exploits()
+        self.sampled_n_successors = np.random.choice(
+            list(self.propositions_prob_n_successors),
+            size=max_n_propositions,
+            p=list(self.propositions_prob_n_successors.values()))
+        random_numbers = np.random.rand(max_n_propositions, 2)
+        i_random_number = 0
+
+        # Add exploits until there are enough of them
+        while len(self.exploits) < self.n_exploits:
+            # Get the list of available propositions
+            available_propositions = self._get_available_propositions()
+
+            n_missing_exploits = self.n_exploits - len(self.exploits)
+            if len(available_propositions) >= n_missing_exploits:
+                # Stop creating new proposition and finish the graph
+                self.probability_new_proposition = 0
+
+            # Get the number of propositions that are required for this
+            # exploit to be performed
+            i_exploit = len(self.exploits)
+            n_required_propositions = all_n_required_propositions[i_exploit]
+
+            # Add and/or link propositions to the exploit
+            predecessors = []
+            required_propositions = []
+            for _ in range(n_required_propositions):
+                random_new, random_position = random_numbers[i_random_number]
+                i_random_number += 1
+
+                new = random_new < self.probability_new_proposition
+                if new or len(available_propositions) == 0:
+                    # Create a new proposition
+                    node, id_proposition = self._add_new_proposition(
+                        initial=True)
+                else:
+                    # Sample one proposition from the list of available
+                    # propositions
+                    position = int(random_position *
+                                   len(available_propositions))
+                    node, id_proposition = available_propositions.pop(position)
+
+                predecessors.append(node)
+                required_propositions.append(id_proposition)
+
+            # Create a new proposition representing the granted proposition
+            successor, granted_proposition = self._add_new_proposition(
+                initial=False)
+
+            # Add the new exploit
+            self._add_new_exploit(required_propositions, granted_proposition,
+                                  predecessors, successor)
+
+        # Finish the graph so that it has only one goal proposition
+        self._finish_graph()
 
     def _finish_graph(self):
         # Look for the proposition nodes that do not have successors
-        nodes_to_merge = []
-        for node, id_proposition in self.graph.nodes(data="id_proposition"):
-            if id_proposition is None:
-                continue
-            n_successors = len(list(self.graph.successors(node)))
-            if n_successors == 0:
-                nodes_to_merge.append((node, id_proposition))
+        current_n_successors = np.array(self.propositions_current_n_successors)
+        ids_propositions = np.flatnonzero(current_n_successors == 0).tolist()
+        nodes_to_merge = [(self.propositions_nodes[id_proposition],
+                           id_proposition)
+                          for id_proposition in ids_propositions]
 
         target_node, target_id_proposition = nodes_to_merge[0]
         self.goal_proposition = target_id_proposition
 
-        if len(nodes_to_merge) == 1:
-            return
-
-        for i_node in range(1, len(nodes_to_merge)):
-            node, id_proposition = nodes_to_merge[i_node]
-            predecessors = list(self.graph.predecessors(node))
-
-            for predecessor in predecessors:
-                # Update the exploit
-                id_exploit = self.graph.nodes[predecessor]["id_exploit"]
-                self.exploits[id_exploit][
-                    "granted_proposition"] = target_id_proposition
-
-                # Update the graph
-                self.graph.add_edge(predecessor, target_node)
-
-            # Remove the node
-            self.graph.remove_node(node)
+        # The other propositions without successors are merged into the first
+        # one. They are only granted by exploits so these exploits grant the
+        # goal proposition instead
+        merged_nodes = set([node for node, _ in nodes_to_merge[1:]])
+        merged_propositions = set(
+            [id_proposition for _, id_proposition in nodes_to_merge[1:]])
+        for exploit in self.exploits.values():
+            if exploit["granted_proposition"] in merged_propositions:
+                exploit["granted_proposition"] = target_id_proposition
+
+        # Build the graph without the merged nodes
+        nodes = [(node, data) for node, data in self.nodes
+                 if node not in merged_nodes]
+        edges = [(src, target_node if dst in merged_nodes else dst)
+                 for src, dst in self.edges]
+        self.graph.add_nodes_from(nodes)
+        self.graph.add_edges_from(edges)
 
     def _get_available_propositions(self) -> List[Tuple[int, int]]:
-        propositions = []
-        for node, id_proposition in self.graph.nodes(data="id_proposition"):
-            if id_proposition is None:
-                continue
-            n_successors = len(list(self.graph.successors(node)))
-            n_required_successors = self.propositions_n_successors[
-                id_proposition]
-            if n_successors < n_required_successors:
-                propositions.append((node, id_proposition))
-        return propositions
+        return list(self.available_propositions.values())
 
     def _add_new_proposition(self, initial: bool) -> Tuple[int, int]:
-        node = self.graph.number_of_nodes()
+        node = self.n_nodes
         id_proposition = len(self.propositions)
 
         # Create and add the proposition
@@ -173,21 +196,26 @@ class Generator:
                            initial=initial)
         self.propositions[id_proposition] = proposition
 
-        # Sample the number of successors for this proposition
-        n_successors = np.random.choice(
-            list(self.propositions_prob_n_successors),
-            p=list(self.propositions_prob_n_successors.values()))
+        # Get the number of successors of this proposition
+        n_successors = self.sampled_n_successors[id_proposition]
         self.propositions_n_successors[id_proposition] = n_successors
 
-        # Update the graph
-        self.graph.add_node(node, id_proposition=id_proposition)
+        # Add the node
+        self.nodes.append((node, dict(id_proposition=id_proposition)))
+        self.propositions_nodes.append(node)
+        self.propositions_current_n_successors.append(0)
+        self.n_nodes += 1
+
+        if n_successors > 0:
+            self.available_propositions[id_proposition] = (node,
+                                                           id_proposition)
 
         return node, id_proposition
 
     def _add_new_exploit(self, required_propositions: List[int],
                          granted_proposition: int, predecessors: List[int],
                          successor: List[int]):
-        node = self.graph.number_of_nodes()
+        node = self.n_nodes
         id_exploit = len(self.exploits)
 
         # Create and add the exploit
@@ -199,8 +227,18 @@ class Generator:
                        cvss=exploit_fake_data["cvss"])
         self.exploits[id_exploit] = exploit
 
-        # Update the graph
-        self.graph.add_node(node, id_exploit=id_exploit)
-        for predecessor in predecessors:
-            self.graph.add_edge(predecessor, node)
-        self.graph.add_edge(node, successor)
+        # Add the node and its edges
+        self.nodes.append((node, dict(id_exploit=id_exploit)))
+        for predecessor, id_proposition in zip(predecessors,
+                                               required_propositions):
+            self.edges.append((predecessor, node))
+            self.propositions_current_n_successors[id_proposition] += 1
+
+            # The proposition is no longer available once it has all its
+            # successors
+            n_successors = self.propositions_current_n_successors[
+                id_proposition]
+            if n_successors == self.propositions_n_successors[id_proposition]:
+                del self.available_propositions[id_proposition]
+        self.edges.append((node, successor))
+        self.n_nodes += 1
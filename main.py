@@ -12,6 +12,7 @@ from embedding.deepwalk import DeepWalk
 from embedding.embedding import EmbeddingMethod
 from embedding.graphsage import GraphSage
 from embedding.hope import Hope
+from functools import lru_cache
 from generation import Generator
 from ranking.abraham import ProbabilisticPath
 from ranking.homer import RiskQuantifier
@@ -44,7 +45,7 @@ def update_attack_graph(graph_data: str, _: int, filename: str,
         # The user wants to load an existing attack graph
         decoded_string = b64decode(graph_data.split(",")[1])
         extension = utils.get_file_extension(filename)
-        attack_graph = get_attack_graph_from_string(decoded_string, extension)
+        attack_graph = parse_attack_graph(decoded_string, extension)
 
     if attack_graph is None:
         return ""
@@ -169,26 +170,28 @@ def display_attack_graph(parameters: dict, graph_data: str) -> dcc.Graph:
 
 def get_table_exploit_ranking(ranking: Dict[int, int],
                               scores: Dict[int, float]) -> List[html.Div]:
+    # The positions are all different so the lines of the table are obtained
+    # by sorting the exploits by position instead of searching each position
     table = []
-    i_line = 0
-    while len(table) // 3 < len(ranking):
-        for id_exploit, position in ranking.items():
-            if position == i_line:
-                score = "{:.2e}".format(scores[id_exploit])
-                if id_exploit is None:
-                    id_exploit = "None"
-                table += [position, id_exploit, score]
-                break
-        i_line += 1
-
-    return [
-        html.Div(className="table-cell", children=table[i])
-        for i in range(len(table))
-    ]
-
-
-def get_attack_graph_from_string(string: str,
-                                 extension: str = "json") -> BaseGraph:
+    for id_exploit in sorted(ranking, key=ranking.get):
+        position = ranking[id_exploit]
+        score = "{:.2e}".format(scores[id_exploit])
+        if id_exploit is None:
+            id_exploit = "None"
+        table += [position, id_exploit, score]
+
+    return [html.Div(className="table-cell", children=cell) for cell in table]
+
+
+# The callbacks that follow an update of the attack graph all parse the same
+# string, so the parsed graphs are cached. They are shared between the
+# callbacks, which only read them
+@lru_cache(maxsize=8)
+def get_attack_graph_from_string(string: str) -> BaseGraph:
+    return parse_attack_graph(string)
+
+
+def parse_attack_graph(string: str, extension: str = "json") -> BaseGraph:
     if string is None:
         return None
 
@@ -45,8 +45,7 @@ class ProbabilisticPath(RankingMethod):
         R = np.zeros((len(transient_nodes), len(absorbing_nodes)))
 
         all_nodes = list(transient_nodes) + list(absorbing_nodes)
-        node_ordering = dict([(all_nodes[i], i)
-                              for i in range(len(all_nodes))])
+        node_ordering = dict(zip(all_nodes, range(len(all_nodes))))
 
         # Create Q and R
         for node in transient_nodes:
@@ -1,7 +1,7 @@
 import numpy as np
 from attack_graph import DependencyAttackGraph
 from ranking.ranking import RankingMethod
-from typing import Dict, Set, Tuple
+from typing import Dict, FrozenSet, Set, Tuple
 
 
 class RiskQuantifier(RankingMethod):
@@ -25,12 +25,19 @@ class RiskQuantifier(RankingMethod):
         ])
 
         # Create dictionaries useful to not compute the same value again
-        self.dict_stored_psi: Dict[str, float] = {}
-        self.dict_stored_phi: Dict[str, float] = {}
+        self.dict_stored_psi: Dict[Tuple[FrozenSet, FrozenSet], float] = {}
+        self.dict_stored_phi: Dict[FrozenSet, float] = {}
 
         # Get the list of branch nodes
         self.branch_nodes = self._get_branch_nodes()
 
+        # The predecessors of the nodes are gathered once as they are checked
+        # each time a node that is ready for evaluation is searched
+        self.dict_predecessors: Dict[int, Set[int]] = dict([
+            (node, set(self.formatted_graph.predecessors(node)))
+            for node in self.formatted_graph.nodes
+        ])
+
         # Treat the case of the root node
         self.evaluated_nodes.add(self.id_root_node)
         self.dict_phi[self.id_root_node] = 1
@@ -119,8 +126,7 @@ class RiskQuantifier(RankingMethod):
         # any predecessor
         exploit_nodes_to_be_linked = [
             node for node, id_exploit in new_graph.nodes(data="id_exploit")
-            if id_exploit is not None
-            and list(new_graph.predecessors(node)) == []
+            if id_exploit is not None and new_graph.in_degree(node) == 0
         ]
         new_graph.add_edges_from([(self.id_root_node, node)
                                   for node in exploit_nodes_to_be_linked])
@@ -130,7 +136,7 @@ class RiskQuantifier(RankingMethod):
     def _get_branch_nodes(self) -> Set[int]:
         return set([
             node for node in self.formatted_graph.nodes
-            if len(list(self.formatted_graph.successors(node))) > 1
+            if self.formatted_graph.out_degree(node) > 1
         ])
 
     def _get_node_ready_for_evaluation(self) -> Tuple[int, Set[int]]:
@@ -140,7 +146,7 @@ class RiskQuantifier(RankingMethod):
                 continue
 
             # Check that the predecessors of the node have all been evaluated
-            predecessors = set(self.formatted_graph.predecessors(node))
+            predecessors = self.dict_predecessors[node]
             if self.evaluated_nodes >= predecessors:
                 return node, predecessors
 
@@ -182,10 +188,10 @@ class RiskQuantifier(RankingMethod):
                 ]
 
             # Compute the value by studying each possible configuration of
-            # values for D
+            # values for D. The nodes of D are listed once for all of them
+            nodes_D = list(D)
             for set_polarities in possible_polarities:
-                D_polarities = dict([(list(D)[i], set_polarities[i])
-                                     for i in range(len(D))])
+                D_polarities = dict(zip(nodes_D, set_polarities))
                 value += self._evaluate_conditional_probability(
                     node_polarities,
                     D_polarities) * self._evaluate_probability(D_polarities)
@@ -254,22 +260,20 @@ class RiskQuantifier(RankingMethod):
                                                               D_polarities)
 
     @staticmethod
-    def _create_phi_key(node_polarities: Dict[int, bool]) -> str:
+    def _create_phi_key(node_polarities: Dict[int, bool]) -> FrozenSet:
         return RiskQuantifier._create_key_from_dict(node_polarities)
 
     @staticmethod
-    def _create_psi_key(node_polarities: Dict[int, bool],
-                        D_polarities: Dict[int, bool]) -> str:
+    def _create_psi_key(
+            node_polarities: Dict[int, bool],
+            D_polarities: Dict[int, bool]) -> Tuple[FrozenSet, FrozenSet]:
         node_key = RiskQuantifier._create_key_from_dict(node_polarities)
         D_key = RiskQuantifier._create_key_from_dict(D_polarities)
-        key = "{}-{}".format(node_key, D_key)
-        return key
+        return node_key, D_key
 
     @staticmethod
-    def _create_key_from_dict(input_dict: Dict[int, bool]) -> str:
-        keys = sorted([
-            "{}*{}".format(node, 1 if polarity else 0)
-            for node, polarity in input_dict.items()
-        ])
-        key = "_".join(keys)
-        return key
+    def _create_key_from_dict(input_dict: Dict[int, bool]) -> FrozenSet:
+        # The pairs of nodes and polarities are hashed as a frozen set, which
+        # doesn't depend on the order of the dictionary and is much cheaper to
+        # build than a sorted string
+        return frozenset(input_dict.items())
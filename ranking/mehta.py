@@ -1,7 +1,7 @@
 import numpy as np
 from attack_graph import StateAttackGraph
 from ranking.ranking import RankingMethod
-from scipy.sparse import csr_matrix
+from scipy.sparse import csr_matrix, identity
 from typing import Dict
 
 
@@ -13,23 +13,34 @@ class PageRankMethod(RankingMethod):
 
     def _compute_normalized_adjacency_matrix(self) -> np.ndarray:
         N = self.graph.number_of_nodes()
-        Z = np.zeros((N, N))
         node_ordering = self.graph.get_node_ordering()
-        for j in self.graph.nodes():
-            # Add an edge with probability 1-d to the starting node
-            Z[node_ordering[0], node_ordering[j]] = 1 - self.d
-
-            probabilities = dict([(i, self.graph.get_edge_probability(j, i))
-                                  for i in self.graph.successors(j)])
-
-            if len(probabilities) == 0:
-                # The node is a goal node, add an edge to itself
-                Z[node_ordering[0], node_ordering[j]] = self.d
-            else:
-                normalization_constant = sum(list(probabilities.values()))
-                for i, probability in probabilities.items():
-                    Z[node_ordering[i], node_ordering[
-                        j]] = self.d * probability / normalization_constant
+
+        # Gather the probability of each edge to fill the matrix at once
+        sources = []
+        destinations = []
+        probabilities = []
+        for j, i in self.graph.edges():
+            sources.append(node_ordering[j])
+            destinations.append(node_ordering[i])
+            probabilities.append(self.graph.get_edge_probability(j, i))
+        sources = np.array(sources, dtype=int)
+        destinations = np.array(destinations, dtype=int)
+        probabilities = np.array(probabilities)
+
+        # Add an edge with probability 1-d from each node to the starting
+        # node. The goal nodes have no successor and get an edge to the
+        # starting node with probability d instead
+        has_no_successor = np.bincount(sources, minlength=N) == 0
+        Z = np.zeros((N, N))
+        Z[node_ordering[0]] = 1 - self.d
+        Z[node_ordering[0], has_no_successor] = self.d
+
+        # Normalize the probabilities of the successors of each node
+        normalization_constants = np.bincount(sources,
+                                              weights=probabilities,
+                                              minlength=N)
+        transitions = self.d * probabilities / normalization_constants[sources]
+        Z[destinations, sources] = transitions
         return Z
 
     def _compute_rank_vector(self,
@@ -48,8 +59,7 @@ class PageRankMethod(RankingMethod):
         Z = self._compute_normalized_adjacency_matrix()
         R = self._compute_rank_vector(Z)
 
-        ids_nodes = list(self.graph.nodes)
-        return dict([(ids_nodes[i], float(R[i])) for i in range(len(R))])
+        return dict(zip(self.graph.nodes, R.tolist()))
 
     def get_score(self) -> float:
         ranks = self.apply()
@@ -76,16 +86,24 @@ class KuehlmannMethod(RankingMethod):
 
     def _compute_transition_probability_matrix(self) -> csr_matrix:
         N = self.graph.number_of_nodes()
-        P = np.zeros((N, N))
         node_ordering = self.graph.get_node_ordering()
-        for i in self.graph.nodes():
-            probabilities = dict([(j, self.graph.get_edge_probability(i, j))
-                                  for j in self.graph.successors(i)])
-            normalization_constant = sum(list(probabilities.values()))
-            for j, probability in probabilities.items():
-                P[node_ordering[i],
-                  node_ordering[j]] = probability / normalization_constant
-        P = csr_matrix(P)
+
+        # Gather the probability of each edge and build the sparse matrix at
+        # once
+        rows = []
+        columns = []
+        probabilities = []
+        for i, j in self.graph.edges():
+            rows.append(node_ordering[i])
+            columns.append(node_ordering[j])
+            probabilities.append(self.graph.get_edge_probability(i, j))
+        P = csr_matrix((probabilities, (rows, columns)), shape=(N, N))
+
+        # Normalize the probabilities of the successors of each node
+        normalization_constants = P.sum(axis=1).A1
+        normalization_constants[normalization_constants == 0] = 1
+        P.data /= np.repeat(normalization_constants, np.diff(P.indptr))
+
         return P
 
     def apply(self, max_m: int = 100) -> Dict[int, float]:
@@ -96,7 +114,7 @@ class KuehlmannMethod(RankingMethod):
         powers_eta = np.power(self.eta, np.arange(max_m + 1))
         r = np.zeros(self.graph.number_of_nodes())
 
-        power_P = csr_matrix(np.identity(self.graph.number_of_nodes()))
+        power_P = identity(self.graph.number_of_nodes(), format="csr")
         current_sum = s
         m = 1
         stop = False
@@ -110,8 +128,7 @@ class KuehlmannMethod(RankingMethod):
             stop = to_add.sum() < 1e-15
 
         r *= (1 - self.eta) / self.eta
-        values = dict([(list(self.graph.nodes)[i], float(r[i]))
-                       for i in range(len(r))])
+        values = dict(zip(self.graph.nodes, r.tolist()))
         return values
 
     def get_score(self) -> float:
@@ -20,8 +20,7 @@ class RankingMethod:
 
         # Create the ordering of the exploits based on the corresponding scores
         ranks = rankdata(list(scores.values()), method="ordinal") - 1
-        ordering = dict([(list(scores)[i], int(ranks[i]))
-                         for i in range(len(self.ids_exploits) + 1)])
+        ordering = dict(zip(scores, ranks.tolist()))
 
         return ordering, scores
 
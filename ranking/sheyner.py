@@ -1,6 +1,5 @@
 import numpy as np
 from attack_graph import BaseGraph, DependencyAttackGraph, StateAttackGraph
-from copy import deepcopy
 from ranking.ranking import RankingMethod
 from typing import Dict
 
@@ -22,13 +21,22 @@ class ValueIteration(RankingMethod):
                      float] = dict([(node, 0) for node in self.graph.nodes])
         delta = np.inf
 
+        # The successors and rewards of the nodes don't change between the
+        # iterations so they are only computed once
+        all_successors = dict([(node, self._get_successors(node))
+                               for node in self.graph.nodes])
+        rewards = dict([(node, self._get_reward(node))
+                        for node in self.graph.nodes])
+
         while delta > self.precision:
-            new_values = deepcopy(values)
+            # Every node gets a new value so they are stored in a new
+            # dictionary instead of a copy of the current one
+            new_values: Dict[int, float] = {}
 
             for node in self.graph.nodes:
                 node_value = values[node]
-                reward = self._get_reward(node)
-                successors = self._get_successors(node)
+                reward = rewards[node]
+                successors = all_successors[node]
 
                 # If the node is the final node, its value is always 1
                 if len(successors) == 0:
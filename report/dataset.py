@@ -47,8 +47,10 @@ class Dataset:
 
     @staticmethod
     def _add_one_pair_graphs(n_exploits: int):
-        # Get current set populations
-        set_populations = Dataset._get_current_set_populations()
+        # Get current set populations. The summary file is read once and the
+        # same list is updated when the graphs are saved
+        graph_summaries = Dataset._get_summary_file_content()
+        set_populations = Dataset._get_current_set_populations(graph_summaries)
         print("\nCurrent set populations: {}".format(" ".join(
             [str(i) for i in set_populations])))
 
@@ -77,10 +79,11 @@ class Dataset:
 
             print("Saving the graphs")
             Dataset._save_graphs(state_attack_graph, dependency_attack_graph,
-                                 n_nodes, appropriate_set)
+                                 n_nodes, appropriate_set, graph_summaries)
 
-            # Print the updated set populations
-            set_populations = Dataset._get_current_set_populations()
+            # Print the updated set populations without reading back the
+            # summary file that has just been written
+            set_populations[appropriate_set] += 1
             print("Current set populations: {}".format(" ".join(
                 [str(i) for i in set_populations])))
         else:
@@ -98,10 +101,7 @@ class Dataset:
         Dataset._add_one_pair_graphs(new_n_exploits)
 
     @staticmethod
-    def _get_current_set_populations() -> List[int]:
-        # Get the current list of graphs that have been created
-        graph_summaries = Dataset._get_summary_file_content()
-
+    def _get_current_set_populations(graph_summaries: List[dict]) -> List[int]:
         # Fill the set populations
         set_populations = [0] * len(Dataset.set_sizes)
         for graph_summary in graph_summaries:
@@ -114,7 +114,8 @@ class Dataset:
     @staticmethod
     def _save_graphs(state_attack_graph: StateAttackGraph,
                      dependency_attack_graph: DependencyAttackGraph,
-                     n_nodes: int, appropriate_set: int):
+                     n_nodes: int, appropriate_set: int,
+                     graph_summaries: List[dict]):
         # Create a base filename based on the current timestamp
         base_filename = str(time()).replace(".", "")[:13]
 
@@ -127,8 +128,7 @@ class Dataset:
                                base_filename + "_dependency.json")
         dependency_attack_graph.save(dependency_path)
 
-        # Get the current list of graphs that have been created
-        graph_summaries = Dataset._get_summary_file_content()
+        # Add the graphs to the current list of graphs that have been created
         new_summary_dict = dict(state_path=str(state_path),
                                 dependency_path=str(dependency_path),
                                 n_nodes=n_nodes,
@@ -205,7 +205,7 @@ class HomerDataset:
         probs = np.random.randint(10, size=size)
         probs = probs.astype(float)
         probs /= np.sum(probs)
-        probs = dict([(i, probs[i]) for i in range(size)])
+        probs = dict(zip(range(size), probs))
         return probs
 
     def load(i_graph: int) -> DependencyAttackGraph:
@@ -217,28 +217,16 @@ class RankingMethodsComparator:
     @staticmethod
     def _compute_ppce(ranking_a: Dict[int, int],
                       ranking_b: Dict[int, int]) -> float:
-        ppce = 0
+        # Gather the values of both rankings in the same order of exploits
         exploits = list(ranking_a)
-
-        for i in range(len(exploits)):
-            for j in range(len(exploits)):
-                if i >= j:
-                    continue
-
-                exploit_0 = exploits[i]
-                exploit_1 = exploits[j]
-
-                value_a_0 = ranking_a[exploit_0]
-                value_a_1 = ranking_a[exploit_1]
-                value_b_0 = ranking_b[exploit_0]
-                value_b_1 = ranking_b[exploit_1]
-
-                # Check that the exploit 0 and 1 are sorted in the same order
-                # in ranking_a and ranking_b
-                difference_a = value_a_0 - value_a_1
-                difference_b = value_b_0 - value_b_1
-                if difference_a * difference_b < 0:
-                    ppce += 1
+        values_a = np.array([ranking_a[exploit] for exploit in exploits])
+        values_b = np.array([ranking_b[exploit] for exploit in exploits])
+
+        # Count the pairs of exploits that are not sorted in the same order in
+        # ranking_a and ranking_b. Each pair appears twice in the matrices
+        differences_a = values_a[:, None] - values_a[None, :]
+        differences_b = values_b[:, None] - values_b[None, :]
+        ppce = np.count_nonzero(differences_a * differences_b < 0) / 2
 
         n_exploits = len(exploits)
         ppce /= (n_exploits * (n_exploits - 1)) / 2
@@ -1,4 +1,4 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Set, Tuple
 
 
 class ClusterDrawer:
@@ -17,6 +17,9 @@ class ClusterDrawer:
         self.horizontal_distance: float = None
         self.vertical_distance: float = None
         self.zones: List[dict] = None
+        # Each key of zones_index corresponds to a (cluster id, layer) couple
+        # and each value corresponds to the zone covering this layer
+        self.zones_index: Dict[Tuple[str, int], dict] = None
 
     def apply(self):
         self.compute_node_assignment()
@@ -48,25 +51,24 @@ class ClusterDrawer:
             self.layers.append(layers[x])
 
     def reposition_nodes_by_cluster(self):
+        # Rank each node by its cluster and then by its position in the
+        # cluster, so that the nodes of a layer can be sorted by cluster
+        ranks: Dict[int, int] = {}
+        for data_cluster in self.clusters.values():
+            cluster_nodes: List[int] = data_cluster["nodes"]
+            for node in cluster_nodes:
+                ranks[node] = len(ranks)
+
         for i_layer, layer in enumerate(self.layers):
             # Compute the list of y of the nodes in the layer
-            list_layer_y = []
-            for node in layer:
-                list_layer_y.append(self.positions[node][1])
-            list_layer_y = sorted(list_layer_y, reverse=True)
+            list_layer_y = sorted([self.positions[node][1] for node in layer],
+                                  reverse=True)
 
             # Give a new position to each node in the layer based on its
             # cluster
-            i_node = 0
-            new_layer = []
-            for data_cluster in self.clusters.values():
-                cluster_nodes: List[int] = data_cluster["nodes"]
-                for node in cluster_nodes:
-                    if node in layer:
-                        self.positions[node] = (self.positions[node][0],
-                                                list_layer_y[i_node])
-                        new_layer.append(node)
-                        i_node += 1
+            new_layer = sorted(layer, key=lambda node: ranks[node])
+            for node, y in zip(new_layer, list_layer_y):
+                self.positions[node] = (self.positions[node][0], y)
             self.layers[i_layer] = new_layer
 
     def compute_axis_distances(self):
@@ -91,6 +93,7 @@ class ClusterDrawer:
 
     def create_zones(self):
         self.zones = []
+        self.zones_index = {}
         for i_layer, layer in enumerate(self.layers):
             for node in layer:
                 i_cluster = self.node_assignment[node]
@@ -101,61 +104,62 @@ class ClusterDrawer:
                                 cluster=i_cluster,
                                 nodes=[node])
                     self.zones.append(zone)
+                    self.zones_index[i_cluster, i_layer] = zone
                 else:
                     # Add the layer and the node to the zone
-                    if i_layer not in zone["layers"]:
+                    if (i_cluster, i_layer) not in self.zones_index:
                         zone["layers"].append(i_layer)
+                        self.zones_index[i_cluster, i_layer] = zone
                     zone["nodes"].append(node)
 
     def get_zone(self, i_layer, i_cluster) -> dict:
-        for zone in self.zones:
-            layers: List[int] = zone["layers"]
-            if zone["cluster"] == i_cluster and (i_layer in layers
-                                                 or i_layer - 1 in layers):
-                return zone
-        return None
+        # A zone can be extended if it already covers the layer or the
+        # previous one
+        zone = self.zones_index.get((i_cluster, i_layer))
+        if zone is None:
+            zone = self.zones_index.get((i_cluster, i_layer - 1))
+        return zone
 
     def add_zones_points(self):
+        if len(self.zones) == 0:
+            return
+
+        # The points of the zones are shifted from the nodes by a fixed offset
+        # that depends on the side of the zone
+        horizontal_offset = 0.2 * self.horizontal_distance
+        vertical_offset = 0.3 * self.vertical_distance
+
         for zone in self.zones:
             points = []
-            nodes: List[int] = zone["nodes"]
+            nodes: Set[int] = set(zone["nodes"])
             layers: List[int] = zone["layers"]
 
             # Left points (from top to bottom)
             for layer_node in self.layers[layers[0]]:
                 if layer_node in nodes:
-                    points.append(self.get_point(layer_node, "left"))
+                    x, y = self.positions[layer_node]
+                    points.append((x - horizontal_offset, y))
 
             # Bottom points (from left to right)
             for i_layer in layers:
                 for layer_node in reversed(self.layers[i_layer]):
                     if layer_node in nodes:
-                        points.append(self.get_point(layer_node, "bottom"))
+                        x, y = self.positions[layer_node]
+                        points.append((x, y - vertical_offset))
                         break
 
             # Right points (from bottom to top)
             for layer_node in reversed(self.layers[layers[-1]]):
                 if layer_node in nodes:
-                    points.append(self.get_point(layer_node, "right"))
+                    x, y = self.positions[layer_node]
+                    points.append((x + horizontal_offset, y))
 
             # Top points (from right to left)
             for i_layer in reversed(layers):
                 for layer_node in self.layers[i_layer]:
                     if layer_node in nodes:
-                        points.append(self.get_point(layer_node, "top"))
+                        x, y = self.positions[layer_node]
+                        points.append((x, y + vertical_offset))
                         break
 
             zone["points"] = points
-
-    def get_point(self, node: int, side: str) -> Tuple[float, float]:
-        x, y = self.positions[node]
-        horizontal_ratio = 0.2
-        vertical_ratio = 0.3
-        if side == "left":
-            return x - horizontal_ratio * self.horizontal_distance, y
-        elif side == "right":
-            return x + horizontal_ratio * self.horizontal_distance, y
-        elif side == "top":
-            return x, y + vertical_ratio * self.vertical_distance
-        else:
-            return x, y - vertical_ratio * self.vertical_distance
@@ -3,7 +3,8 @@ import networkx as nx
 import plotly.graph_objects as go
 import ui.constants
 from attack_graph import DependencyAttackGraph, StateAttackGraph
-from typing import Dict, List, Tuple
+from collections import deque
+from typing import Deque, Dict, List, Set, Tuple
 from ui.cluster_drawing import ClusterDrawer
 
 
@@ -38,6 +39,18 @@ class BaseGraphDrawer:
     def compute_positions(self):
         return None
 
+    def compute_multipartite_positions(self, subsets: Dict[int, int]):
+        # The layout is computed on a separate graph that only holds the nodes
+        # and their subsets. The attack graph may be shared between the
+        # callbacks of the app so it is not modified
+        layout_graph = nx.Graph()
+        layout_graph.add_nodes_from([(node, dict(subset=subset))
+                                     for node, subset in subsets.items()])
+
+        positions = nx.drawing.layout.multipartite_layout(layout_graph)
+        self.positions = dict([(node, (float(position[0]), float(position[1])))
+                               for node, position in positions.items()])
+
     def compute_cluster_drawing(self):
         if self.clusters is None:
             return
@@ -52,14 +65,9 @@ class BaseGraphDrawer:
 
     def add_node_objects(self, dict_positions: Dict[int, Tuple[float, float]],
                          dict_hovertexts: Dict[int, str], colors: List[str]):
-        x = []
-        y = []
-        hovertext = []
-        for node in dict_positions:
-            position = dict_positions[node]
-            x.append(position[0])
-            y.append(position[1])
-            hovertext.append(dict_hovertexts[node])
+        x = [position[0] for position in dict_positions.values()]
+        y = [position[1] for position in dict_positions.values()]
+        hovertext = [dict_hovertexts[node] for node in dict_positions]
 
         node_objects = go.Scatter(
             x=x,
@@ -74,13 +82,15 @@ class BaseGraphDrawer:
 
     def add_edge_objects(self, edges: List[Tuple[Tuple[float, float],
                                                  Tuple[float, float]]]):
-        x = []
-        y = []
-        for edge in edges:
-            src = edge[0]
-            dst = edge[1]
-            x += [src[0], dst[0], None]
-            y += [src[1], dst[1], None]
+        # All the edges are drawn as a single line which is interrupted by a
+        # None after each edge. The coordinates are filled by slices instead
+        # of extending the lists edge by edge
+        x = [None] * (3 * len(edges))
+        y = [None] * (3 * len(edges))
+        x[0::3] = [src[0] for src, _ in edges]
+        x[1::3] = [dst[0] for _, dst in edges]
+        y[0::3] = [src[1] for src, _ in edges]
+        y[1::3] = [dst[1] for _, dst in edges]
 
         self.objects.append(
             go.Scatter(x=x,
@@ -152,15 +162,13 @@ class StateAttackGraphDrawer(BaseGraphDrawer):
         n_initial_propositions = len(
             self.attack_graph.nodes[0]["ids_propositions"])
 
-        for node, ids_propositions in self.attack_graph.nodes(
-                data="ids_propositions"):
-            self.attack_graph.nodes[node]["subset"] = len(
-                ids_propositions) - n_initial_propositions
+        # The subset of a node is its number of propositions that are not
+        # initially true
+        subsets = dict([(node, len(ids_propositions) - n_initial_propositions)
+                        for node, ids_propositions in self.attack_graph.nodes(
+                            data="ids_propositions")])
 
-        self.positions = nx.drawing.layout.multipartite_layout(
-            self.attack_graph)
-        self.positions = dict([(node, (float(position[0]), float(position[1])))
-                               for node, position in self.positions.items()])
+        self.compute_multipartite_positions(subsets)
 
     def add_all_objects(self):
         super().add_all_objects()
@@ -201,50 +209,55 @@ class DependencyAttackGraphDrawer(BaseGraphDrawer):
 
     def compute_positions(self) -> Dict[int, Tuple[float, float]]:
         node_layers: Dict[int, int] = {}
-        nodes_to_evaluate: List[int] = []
+
+        # The nodes to evaluate are kept in a queue along with a set to know
+        # quickly whether a node is already in it
+        nodes_to_evaluate: Deque[int] = deque()
+        queued_nodes: Set[int] = set()
 
         # Find the goal node
-        nodes_to_evaluate += self.attack_graph.goal_nodes
+        goal_nodes = set(self.attack_graph.goal_nodes)
+        nodes_to_evaluate.extend(self.attack_graph.goal_nodes)
+        queued_nodes.update(self.attack_graph.goal_nodes)
 
         while len(node_layers) < self.attack_graph.number_of_nodes():
-            node = nodes_to_evaluate[0]
+            # Remove the node from the list of nodes to evaluate
+            node = nodes_to_evaluate.popleft()
+            queued_nodes.remove(node)
             data = self.attack_graph.nodes[node]
             successors = set(self.attack_graph.successors(node))
 
             layer = None
-            if node in self.attack_graph.goal_nodes:
+            if node in goal_nodes:
                 layer = 0
-            elif set(node_layers) >= successors:
+            elif node_layers.keys() >= successors:
                 # All the successors have been evaluated
                 if "id_proposition" in data:
                     layer = max([node_layers[s] for s in successors]) + 1
                 else:
                     layer = node_layers[list(successors)[0]] + 1
 
-            # Remove the node from the list of nodes to evaluate
-            nodes_to_evaluate = nodes_to_evaluate[1:]
-
             if layer is None:
                 # The node cannot be assigned to a layer yet
                 # Add it at the end of the list
                 nodes_to_evaluate.append(node)
+                queued_nodes.add(node)
             else:
                 node_layers[node] = layer
 
                 # Add the node's predecessors to the list of nodes to
                 # evaluate
                 for predecessor in self.attack_graph.predecessors(node):
-                    if predecessor not in nodes_to_evaluate:
+                    if predecessor not in queued_nodes:
                         nodes_to_evaluate.append(predecessor)
+                        queued_nodes.add(predecessor)
 
-        for node in self.attack_graph.nodes:
-            self.attack_graph.nodes[node]["subset"] = max(
-                node_layers.values()) - node_layers[node]
+        # The goal nodes are drawn on the right, in the last subset
+        max_layer = max(node_layers.values())
+        subsets = dict([(node, max_layer - node_layers[node])
+                        for node in self.attack_graph.nodes])
 
-        self.positions = nx.drawing.layout.multipartite_layout(
-            self.attack_graph)
-        self.positions = dict([(node, (float(position[0]), float(position[1])))
-                               for node, position in self.positions.items()])
+        self.compute_multipartite_positions(subsets)
 
     def add_all_objects(self):
         super().add_all_objects()